@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+import atexit
 import json
+import os
 import re
 import sys
 from datetime import datetime
@@ -18,27 +20,44 @@ if str(src_dir) not in sys.path:
 
 from flask import Flask, redirect, render_template_string, request, url_for, jsonify
 
-from src.filter import ContentModerator
+from src.filter import ContentModerator, ShadowEvaluator
+from src.filter.response import moderation_response, moderation_response_json
+from src.filter.shadow import candidate_from_dir
 
 BASE_DIR = Path(__file__).parent
 PENDING_FILE = BASE_DIR / "pending_posts.json"
 
 app = Flask(__name__)
-moderator = ContentModerator.load_default()
-
-
-def moderation_result_to_response(result):
-    return {
-        "status": result.status.value if hasattr(result.status, "value") else str(result.status),
-        "reason": result.reason,
-        "scores": {
-            "spam_rule": result.scores.get("spam_rule", 0),
-            "spam_model": result.scores.get("spam_model", 0),
-            "politics_rule": result.scores.get("politics_rule", 0),
-            "politics_model": result.scores.get("politics_model", 0)
-        },
-        "politics_keywords": result.metadata.get("politics_keywords", [])
-    }
+
+
+def build_shadow_evaluator():
+    """SHADOW_MODEL_DIRS: virgülle ayrılmış aday model klasörleri (boşsa shadow kapalı)."""
+    dirs = [item.strip() for item in os.getenv("SHADOW_MODEL_DIRS", "").split(",") if item.strip()]
+    if not dirs:
+        return None
+    # Aynı klasör adı farklı yollarda olabilir (a/models, b/models); tam yol anahtar olarak kullanılır.
+    candidates = {item: candidate_from_dir(Path(item)) for item in dict.fromkeys(dirs)}
+    return ShadowEvaluator(
+        candidates,
+        sample_rate=float(os.getenv("SHADOW_SAMPLE_RATE", "0.1")),
+        queue_size=int(os.getenv("SHADOW_QUEUE_SIZE", "1000")),
+    )
+
+
+shadow = build_shadow_evaluator()
+if shadow is not None:
+    atexit.register(shadow.close)
+moderator = ContentModerator.load_default(shadow=shadow)
+
+
+def _fast_json_compatible() -> bool:
+    """moderation_response_json, jsonify'ın varsayılan ayarlarını (sıralı, kompakt, ASCII) taklit eder."""
+    provider = app.json
+    compact = getattr(provider, "compact", False)
+    if compact is False or (compact is None and app.debug):
+        return False
+    return getattr(provider, "sort_keys", False) is True and getattr(provider, "ensure_ascii", False) is True
+
 
 @app.route("/api/moderate", methods=["POST"])
 def moderate_api():
@@ -55,37 +74,20 @@ def moderate_api():
     ])
 
     mod_result = moderator.moderate(combined)
-    meta = mod_result.metadata or {}
-
-    forbidden = meta.get("forbidden_words", [])
-    spam_kw = meta.get("spam_keywords", [])
-    politics_kw = meta.get("politics_keywords", [])
-
-    response = {
-        "moderation": moderation_result_to_response(mod_result),
 
-        "analysis": {
-            "forbidden": {
-                "count": len(forbidden),
-                "words": forbidden
-            },
-            "spam": {
-                "count": len(spam_kw),
-                "keywords": spam_kw
-            },
-            "politics": {
-                "count": len(politics_kw),
-                "keywords": politics_kw
-            }
-        },
+    if not _fast_json_compatible():
+        return jsonify(moderation_response(mod_result))
+    return app.response_class(moderation_response_json(mod_result), mimetype=app.json.mimetype)
 
-    }
 
-    return jsonify(response)
+@app.route("/api/shadow", methods=["GET"])
+def shadow_api():
+    if shadow is None:
+        return jsonify({"enabled": False})
+    return jsonify(shadow.snapshot())
 
 
 if __name__ == "__main__":
-    import os
     debug_mode = os.getenv("FLASK_DEBUG", "False").lower() == "true"
     host = os.getenv("FLASK_HOST", "0.0.0.0")
     port = int(os.getenv("FLASK_PORT", "5002"))
@@ -0,0 +1,216 @@
+"""Benchmark of the /api/moderate result and response path.
+
+Compares the previous flow with the current one:
+
+* legacy: ``@dataclass`` result with eagerly sorted metadata, the nested
+  response dict from the old ``app.py`` and ``jsonify``;
+* current: slotted ``ModerationResult`` with lazy metadata sorting and the
+  one-step ``moderation_response_json`` serializer.
+
+Per request it reports the tracemalloc blocks and bytes still held by the
+returned object (retained allocations), the transient tracemalloc peak in
+bytes, and latency. The end-to-end cases go through Flask's test client and
+are skipped when Flask is not installed.
+
+    python benchmarks/bench_response.py [--iterations 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.filter import ContentModerator  # noqa: E402
+from src.filter.moderator import ModerationResult, ModerationStatus  # noqa: E402
+from src.filter.response import moderation_response_json  # noqa: E402
+
+SAMPLES = [
+    "Bugün hava çok güzel, yürüyüşe çıkıyorum.",
+    "bedava bonus kazanmak için hemen https://spam.test linke tıkla",
+    "Bu seçim manifestomuzda demokrasi ve meclis reformu var, oy verin!",
+]
+_ALLOC_ITERATIONS = 60
+
+
+@dataclass
+class LegacyModerationResult:
+    status: ModerationStatus
+    reason: list[str]
+    scores: Dict[str, float]
+    metadata: Dict[str, object]
+
+
+def legacy_moderate(moderator: ContentModerator, text: str) -> LegacyModerationResult:
+    """The previous ``ContentModerator.moderate``: eager sorting, dataclass result."""
+    normalized = moderator.normalizer.normalize(text or "")
+    lexicon_match = moderator.lexicon.scan_tokens(normalized.tokens)
+    rule_scores = moderator.rules.evaluate_match(normalized, lexicon_match)
+    spam_prob = moderator.spam_model.predict_proba(rule_scores.features)
+    politics_prob = moderator.politics_model.predict_proba(rule_scores.features)
+    scores = {
+        "spam_rule": round(rule_scores.spam_score, 3),
+        "spam_model": round(spam_prob, 3),
+        "politics_rule": round(rule_scores.politics_score, 3),
+        "politics_model": round(politics_prob, 3),
+    }
+    reasons: list[str] = []
+    forbidden_flag = bool(lexicon_match.has_forbidden)
+    spam_flag = moderator._should_flag_spam(scores)
+    politics_flag = moderator._should_flag_politics(scores)
+    if forbidden_flag:
+        reasons.append("yasakli_kelime_kullanimi")
+    if spam_flag:
+        reasons.append("spam_supheli")
+    if politics_flag:
+        reasons.append("politics_supheli")
+    if forbidden_flag:
+        status = ModerationStatus.REJECT
+    elif politics_flag:
+        status = ModerationStatus.ADMIN_REVIEW_POLITICS
+    elif spam_flag:
+        status = ModerationStatus.ADMIN_REVIEW_SPAM
+    else:
+        status = ModerationStatus.ACCEPT
+        reasons = ["temiz"]
+    return LegacyModerationResult(
+        status=status,
+        reason=reasons,
+        scores=scores,
+        metadata={
+            "forbidden_words": sorted(lexicon_match.forbidden),
+            "spam_keywords": sorted(lexicon_match.spam),
+            "politics_keywords": sorted(lexicon_match.politics),
+        },
+    )
+
+
+def legacy_response(result) -> Dict[str, object]:
+    """The previous app.py response dict (``moderation_result_to_response`` + ``analysis``)."""
+    meta = result.metadata or {}
+    forbidden = meta.get("forbidden_words", [])
+    spam_kw = meta.get("spam_keywords", [])
+    politics_kw = meta.get("politics_keywords", [])
+    return {
+        "moderation": {
+            "status": result.status.value if hasattr(result.status, "value") else str(result.status),
+            "reason": result.reason,
+            "scores": {
+                "spam_rule": result.scores.get("spam_rule", 0),
+                "spam_model": result.scores.get("spam_model", 0),
+                "politics_rule": result.scores.get("politics_rule", 0),
+                "politics_model": result.scores.get("politics_model", 0),
+            },
+            "politics_keywords": result.metadata.get("politics_keywords", []),
+        },
+        "analysis": {
+            "forbidden": {"count": len(forbidden), "words": forbidden},
+            "spam": {"count": len(spam_kw), "keywords": spam_kw},
+            "politics": {"count": len(politics_kw), "keywords": politics_kw},
+        },
+    }
+
+
+def legacy_body(result) -> bytes:
+    """``jsonify`` encoding of the legacy dict, without needing Flask."""
+    import json
+
+    return (json.dumps(legacy_response(result), sort_keys=True, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _traced_blocks(snapshot: tracemalloc.Snapshot) -> tuple[int, int]:
+    stats = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)]).statistics("filename")
+    return sum(stat.count for stat in stats), sum(stat.size for stat in stats)
+
+
+def measure(label, func, iterations):
+    for text in SAMPLES:
+        func(text)
+
+    retained_blocks, retained_bytes, peaks = [], [], []
+    tracemalloc.start()
+    for index in range(_ALLOC_ITERATIONS):
+        text = SAMPLES[index % len(SAMPLES)]
+        blocks_before, bytes_before = _traced_blocks(tracemalloc.take_snapshot())
+        tracemalloc.reset_peak()
+        current_before, _ = tracemalloc.get_traced_memory()
+        kept = func(text)
+        _, peak = tracemalloc.get_traced_memory()
+        blocks_after, bytes_after = _traced_blocks(tracemalloc.take_snapshot())
+        retained_blocks.append(blocks_after - blocks_before)
+        retained_bytes.append(bytes_after - bytes_before)
+        peaks.append(peak - current_before)
+        del kept
+    tracemalloc.stop()
+
+    timings = []
+    for index in range(iterations):
+        started = time.perf_counter()
+        func(SAMPLES[index % len(SAMPLES)])
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(
+        f"{label:<32} retained={statistics.median(retained_blocks):>5.0f} blocks/"
+        f"{statistics.median(retained_bytes):>6.0f} B  "
+        f"peak={statistics.median(peaks):>7.0f} B  "
+        f"p50={timings[len(timings) // 2] * 1e6:>7.1f} us  "
+        f"p95={timings[int(len(timings) * 0.95)] * 1e6:>7.1f} us"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    moderator = ContentModerator.load_default()
+
+    # Türkçe anahtar kelimeler ASCII kaçışı gerektirir; trafiğin büyük kısmı böyle.
+    non_ascii = ModerationResult(
+        status=ModerationStatus.REJECT,
+        reason=["yasakli_kelime_kullanimi", "politics_supheli"],
+        scores={"spam_rule": 0.1, "spam_model": 0.2, "politics_rule": 0.7, "politics_model": 0.8},
+        matches=({"şerefsiz"}, set(), {"seçim", "hükümet"}),
+    )
+
+    measure("result (legacy dataclass)", lambda text: legacy_moderate(moderator, text), args.iterations)
+    measure("result (slotted, lazy)", moderator.moderate, args.iterations)
+    measure("non-ascii serialize (legacy)", lambda _: legacy_body(non_ascii), args.iterations)
+    measure("non-ascii serialize (one-step)", lambda _: moderation_response_json(non_ascii), args.iterations)
+    measure("moderate+serialize (legacy)", lambda text: legacy_body(legacy_moderate(moderator, text)), args.iterations)
+    measure("moderate+serialize (current)", lambda text: moderation_response_json(moderator.moderate(text)), args.iterations)
+
+    try:
+        import app as flask_app
+        from flask import jsonify
+    except ImportError as exc:
+        print(f"end-to-end skipped: {exc}")
+        return 0
+
+    def legacy_route():
+        data = flask_app.request.get_json()
+        combined = "\n".join([data.get("title", ""), data.get("category", ""), data.get("body", ""), data.get("notes", "")])
+        return jsonify(legacy_response(legacy_moderate(flask_app.moderator, combined)))
+
+    flask_app.app.add_url_rule("/bench/legacy-moderate", "bench_legacy_moderate", legacy_route, methods=["POST"])
+    client = flask_app.app.test_client()
+    for text in SAMPLES:
+        legacy = client.post("/bench/legacy-moderate", json={"title": text}).get_data()
+        current = client.post("/api/moderate", json={"title": text}).get_data()
+        assert legacy == current, "legacy and current responses differ"
+
+    measure("end-to-end (legacy jsonify)", lambda text: client.post("/bench/legacy-moderate", json={"title": text}), args.iterations)
+    measure("end-to-end (current)", lambda text: client.post("/api/moderate", json={"title": text}), args.iterations)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
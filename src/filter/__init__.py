@@ -1,10 +1,12 @@
 """Spam filter package exports."""
 
 from .moderator import ContentModerator, ModerationResult, ModerationStatus
+from .shadow import ShadowEvaluator
 
 __all__ = [
     "ContentModerator",
     "ModerationResult",
     "ModerationStatus",
+    "ShadowEvaluator",
 ]
 
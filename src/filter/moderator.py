@@ -2,9 +2,9 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import time
 from enum import Enum
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, AbstractSet, Dict, Optional, Tuple
 
 from .config import DEFAULT_CONFIG, FilterConfig
 from .lexicon import LexiconChecker
@@ -12,6 +12,9 @@ from .model import LinearModel
 from .normalizer import TextNormalizer
 from .rules import RuleEngine
 
+if TYPE_CHECKING:
+    from .shadow import ShadowEvaluator
+
 
 class ModerationStatus(str, Enum):
     ACCEPT = "kabul"
@@ -20,19 +23,68 @@ class ModerationStatus(str, Enum):
     ADMIN_REVIEW_POLITICS = "yeniden_admin_kontrolu_politics"
 
 
-@dataclass
 class ModerationResult:
-    status: ModerationStatus
-    reason: list[str]
-    scores: Dict[str, float]
-    metadata: Dict[str, object]
+    """Outcome of a moderation call.
+
+    Slotted to keep per-request allocations small. Lexicon hits can be passed
+    as unsorted ``matches`` (forbidden, spam, politics); the sorted
+    ``metadata`` dict is only built the first time it is read.
+    """
+
+    __slots__ = ("status", "reason", "scores", "_metadata", "_matches")
+
+    def __init__(
+        self,
+        status: ModerationStatus,
+        reason: list[str],
+        scores: Dict[str, float],
+        metadata: Optional[Dict[str, object]] = None,
+        matches: Optional[Tuple[AbstractSet[str], AbstractSet[str], AbstractSet[str]]] = None,
+    ) -> None:
+        self.status = status
+        self.reason = reason
+        self.scores = scores
+        self._metadata = metadata
+        self._matches = matches
+
+    @property
+    def metadata(self) -> Dict[str, object]:
+        if self._metadata is None:
+            forbidden, spam, politics = self._matches or ((), (), ())
+            self._metadata = {
+                "forbidden_words": sorted(forbidden),
+                "spam_keywords": sorted(spam),
+                "politics_keywords": sorted(politics),
+            }
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value: Dict[str, object]) -> None:
+        self._metadata = value
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ModerationResult):
+            return NotImplemented
+        return (self.status, self.reason, self.scores, self.metadata) == (
+            other.status,
+            other.reason,
+            other.scores,
+            other.metadata,
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"ModerationResult(status={self.status!r}, reason={self.reason!r}, "
+            f"scores={self.scores!r}, metadata={self.metadata!r})"
+        )
 
 
 class ContentModerator:
     """Encapsulates the entire moderation pipeline."""
 
-    def __init__(self, config: FilterConfig) -> None:
+    def __init__(self, config: FilterConfig, shadow: Optional["ShadowEvaluator"] = None) -> None:
         self.config = config
+        self.shadow = shadow
         self.normalizer = TextNormalizer(config.normalizer)
         self.lexicon = LexiconChecker(config.lexicon_dir)
         self.rules = RuleEngine(config.rule_weights)
@@ -40,15 +92,18 @@ class ContentModerator:
         self.politics_model = LinearModel.load(config.model_dir / "politics_model.json")
 
     def moderate(self, text: str) -> ModerationResult:
+        if self.shadow is None:
+            return self._moderate(text)
+        started = time.perf_counter()
+        result = self._moderate(text)
+        # Aday moderatörler arka planda çalışır; burada sadece kuyruğa eklenir.
+        self.shadow.submit(text, result, time.perf_counter() - started)
+        return result
+
+    def _moderate(self, text: str) -> ModerationResult:
         normalized = self.normalizer.normalize(text or "")
         lexicon_match = self.lexicon.scan_tokens(normalized.tokens)
-
-        extra_features = {
-            "spam_keyword_hits": float(len(lexicon_match.spam)),
-            "politics_keyword_hits": float(len(lexicon_match.politics)),
-        }
-
-        rule_scores = self.rules.evaluate(normalized, extra_features=extra_features)
+        rule_scores = self.rules.evaluate_match(normalized, lexicon_match)
         spam_prob = self.spam_model.predict_proba(rule_scores.features)
         politics_prob = self.politics_model.predict_proba(rule_scores.features)
 
@@ -89,11 +144,7 @@ class ContentModerator:
             status=status,
             reason=reasons,
             scores=scores,
-            metadata={
-                "forbidden_words": sorted(lexicon_match.forbidden),
-                "spam_keywords": sorted(lexicon_match.spam),
-                "politics_keywords": sorted(lexicon_match.politics),
-            },
+            matches=(lexicon_match.forbidden, lexicon_match.spam, lexicon_match.politics),
         )
 
 
@@ -106,6 +157,8 @@ class ContentModerator:
         thresholds = self.config.thresholds
         return scores["politics_rule"] >= thresholds.politics_rule or scores["politics_model"] >= thresholds.politics_model
     @classmethod
-    def load_default(cls, config: Optional[FilterConfig] = None) -> "ContentModerator":
-        return cls(config or DEFAULT_CONFIG)
+    def load_default(
+        cls, config: Optional[FilterConfig] = None, shadow: Optional["ShadowEvaluator"] = None
+    ) -> "ContentModerator":
+        return cls(config or DEFAULT_CONFIG, shadow=shadow)
 
@@ -34,7 +34,6 @@ class TextNormalizer:
         """Return normalized, tokenized representation of text."""
         cleaned = self._basic_clean(text)
         tokens = [tok for tok in _TOKEN_SPLIT.split(cleaned) if tok]
-        print(tokens)
         return NormalizedText(original=text, cleaned=cleaned, tokens=tokens)
 
     def _basic_clean(self, text: str) -> str:
@@ -0,0 +1,54 @@
+"""API response building and JSON serialization for moderation results.
+
+The output matches Flask's ``jsonify`` in non-debug mode byte for byte
+(sorted keys, compact separators, ASCII escaping, trailing newline). The
+payload is built with keys already in sorted order, so the stdlib C encoder
+runs without ``sort_keys``.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Dict
+
+from .moderator import ModerationResult
+
+_SCORE_KEYS = ("politics_model", "politics_rule", "spam_model", "spam_rule")
+_encoder = json.JSONEncoder(ensure_ascii=True, separators=(",", ":"))
+
+
+def moderation_response(result: ModerationResult) -> Dict[str, object]:
+    """Build the ``/api/moderate`` payload.
+
+    Keys are inserted in sorted order so the dict can be encoded without
+    ``sort_keys``.
+    """
+    meta = result.metadata or {}
+    forbidden = meta.get("forbidden_words", [])
+    spam_kw = meta.get("spam_keywords", [])
+    politics_kw = meta.get("politics_keywords", [])
+    scores = result.scores
+    status = result.status
+    return {
+        "analysis": {
+            "forbidden": {"count": len(forbidden), "words": forbidden},
+            "politics": {"count": len(politics_kw), "keywords": politics_kw},
+            "spam": {"count": len(spam_kw), "keywords": spam_kw},
+        },
+        "moderation": {
+            "politics_keywords": politics_kw,
+            "reason": result.reason,
+            "scores": {key: scores.get(key, 0) for key in _SCORE_KEYS},
+            "status": status.value if hasattr(status, "value") else str(status),
+        },
+    }
+
+
+def dumps_response(payload: Dict[str, object]) -> bytes:
+    """Encode a key-sorted payload exactly like ``jsonify`` does."""
+    return (_encoder.encode(payload) + "\n").encode("utf-8")
+
+
+def moderation_response_json(result: ModerationResult) -> bytes:
+    """Serialize ``result`` into the ``/api/moderate`` response body."""
+    return dumps_response(moderation_response(result))
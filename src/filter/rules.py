@@ -8,6 +8,7 @@ from dataclasses import dataclass
 from typing import Dict
 
 from .config import RuleWeights
+from .lexicon import LexiconMatch
 from .normalizer import NormalizedText, extract_uppercase_ratio, sentence_count
 
 URL_PATTERN = re.compile(r"https?://", re.IGNORECASE)
@@ -35,6 +36,17 @@ class RuleEngine:
         politics_score = self._politics_score(features)
         return RuleScores(spam_score=spam_score, politics_score=politics_score, features=features)
 
+    def evaluate_match(self, normalized: NormalizedText, lexicon_match: LexiconMatch) -> RuleScores:
+        """Evaluate rules with keyword-hit features taken from a lexicon scan.
+
+        Shared by the moderator and the offline trainer so both see the same features.
+        """
+        extra_features = {
+            "spam_keyword_hits": float(len(lexicon_match.spam)),
+            "politics_keyword_hits": float(len(lexicon_match.politics)),
+        }
+        return self.evaluate(normalized, extra_features=extra_features)
+
     def _extract_features(self, normalized: NormalizedText) -> Dict[str, float]:
         text = normalized.original
         tokens = normalized.tokens
@@ -0,0 +1,211 @@
+"""Shadow evaluation of candidate moderators off the request path.
+
+A sampled share of the texts the primary moderator sees is queued together
+with the primary decision and latency. A background worker replays them on
+each candidate moderator and records status disagreements and latencies.
+The queue is bounded: when it is full the sample is dropped and counted, so
+the caller never waits on a candidate.
+"""
+
+from __future__ import annotations
+
+import json
+import queue
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import replace
+from pathlib import Path
+from typing import Deque, Dict, Mapping, Optional, Protocol
+
+from .config import DEFAULT_CONFIG, FilterConfig, Thresholds
+from .moderator import ContentModerator, ModerationResult
+
+_LATENCY_WINDOW = 1024
+
+
+class _Moderates(Protocol):
+    def moderate(self, text: str) -> ModerationResult:
+        ...
+
+
+class _LatencyStats:
+    """Running latency summary with a window of recent samples."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.recent: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+        self.recent.append(seconds)
+
+    def snapshot(self) -> Dict[str, float]:
+        recent = sorted(self.recent)
+        p50 = recent[len(recent) // 2] if recent else 0.0
+        p95 = recent[min(int(len(recent) * 0.95), len(recent) - 1)] if recent else 0.0
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(p50 * 1000, 3),
+            "p95_ms": round(p95 * 1000, 3),
+            "max_ms": round(self.maximum * 1000, 3),
+        }
+
+
+class _CandidateStats:
+    def __init__(self) -> None:
+        self.compared = 0
+        self.disagreements = 0
+        self.errors = 0
+        # primary status -> candidate status -> count
+        self.transitions: Dict[str, Dict[str, int]] = {}
+        self.latency = _LatencyStats()
+
+    def record(self, primary: str, candidate: str, seconds: float) -> None:
+        self.compared += 1
+        if primary != candidate:
+            self.disagreements += 1
+        row = self.transitions.setdefault(primary, {})
+        row[candidate] = row.get(candidate, 0) + 1
+        self.latency.add(seconds)
+
+    def snapshot(self) -> Dict[str, object]:
+        by_status = {}
+        for primary, row in self.transitions.items():
+            total = sum(row.values())
+            disagreed = total - row.get(primary, 0)
+            by_status[primary] = {"compared": total, "disagreements": disagreed, "candidate_status": dict(row)}
+        return {
+            "compared": self.compared,
+            "disagreements": self.disagreements,
+            "disagreement_rate": round(self.disagreements / self.compared, 4) if self.compared else 0.0,
+            "errors": self.errors,
+            "by_status": by_status,
+            "latency": self.latency.snapshot(),
+        }
+
+
+class ShadowEvaluator:
+    """Replays sampled requests on candidate moderators in a background thread."""
+
+    def __init__(
+        self,
+        candidates: Mapping[str, _Moderates],
+        sample_rate: float = 0.1,
+        queue_size: int = 1000,
+        seed: Optional[int] = None,
+    ) -> None:
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self.candidates = dict(candidates)
+        self.sample_rate = sample_rate
+        self._random = random.Random(seed)
+        self._queue: "queue.Queue[Optional[tuple[str, str, float]]]" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._sampled = 0
+        self._dropped = 0
+        self._primary_latency = _LatencyStats()
+        self._stats = {name: _CandidateStats() for name in self.candidates}
+        self._worker = threading.Thread(target=self._run, name="shadow-evaluator", daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str, primary: ModerationResult, latency: float) -> None:
+        """Queue ``text`` for shadow evaluation if it is sampled; never blocks."""
+        if self._closed.is_set() or self._random.random() >= self.sample_rate:
+            return
+        try:
+            self._queue.put_nowait((text, primary.status.value, latency))
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            return
+        with self._lock:
+            self._sampled += 1
+
+    def join(self) -> None:
+        """Block until every queued sample has been evaluated."""
+        self._queue.join()
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Stop sampling and the worker; samples still queued are discarded.
+
+        Waits at most ``timeout`` seconds for a candidate that is still running.
+        """
+        self._closed.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            # İşçi bir sonraki örneği alınca kapatıldığını görür.
+            pass
+        self._worker.join(timeout)
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "enabled": True,
+                "sample_rate": self.sample_rate,
+                "sampled": self._sampled,
+                "dropped": self._dropped,
+                "queued": self._queue.qsize(),
+                "primary_latency": self._primary_latency.snapshot(),
+                "candidates": {name: stats.snapshot() for name, stats in self._stats.items()},
+            }
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None or self._closed.is_set():
+                    break
+                self._evaluate(*item)
+            finally:
+                self._queue.task_done()
+        # Kalan örnekler atılır; join() beklemede kalmaz.
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._queue.task_done()
+
+    def _evaluate(self, text: str, primary_status: str, primary_latency: float) -> None:
+        with self._lock:
+            self._primary_latency.add(primary_latency)
+        for name, candidate in self.candidates.items():
+            started = time.perf_counter()
+            try:
+                status = candidate.moderate(text).status.value
+            except Exception:
+                # Aday hatası işçiyi durdurmamalı; sadece sayılır.
+                with self._lock:
+                    self._stats[name].errors += 1
+                continue
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._stats[name].record(primary_status, status, elapsed)
+
+
+def candidate_from_dir(directory: Path, base: Optional[FilterConfig] = None) -> ContentModerator:
+    """Build a candidate moderator from a directory of trained artefacts.
+
+    The directory must hold ``spam_model.json`` and ``politics_model.json``.
+    An optional ``thresholds.json`` and ``lexicons/`` sub-directory override
+    the base configuration.
+    """
+    config = replace(base or DEFAULT_CONFIG, model_dir=directory)
+    thresholds_path = directory / "thresholds.json"
+    if thresholds_path.exists():
+        with thresholds_path.open("r", encoding="utf-8") as handler:
+            config = replace(config, thresholds=Thresholds(**json.load(handler)))
+    if (directory / "lexicons").is_dir():
+        config = replace(config, lexicon_dir=directory / "lexicons")
+    return ContentModerator(config)
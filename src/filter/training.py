@@ -0,0 +1,554 @@
+"""Offline trainer for the JSON-backed linear models.
+
+Labeled posts are streamed from an NDJSON file (one object per line) through
+the same normalizer, lexicon and rule pipeline the moderator uses. Extracted
+feature rows are cached on disk as packed float64 values and memory-mapped
+for every epoch and for the threshold sweep, so re-normalization only happens
+when the source file or the feature configuration changes. Every epoch draws
+a new permutation of row ids (8 bytes per row), so minibatches mix rows from
+the whole file even when the source is grouped by label.
+
+When numpy is installed each minibatch update is a pair of matrix products;
+without it the same update is computed with a scalar loop per row.
+
+Each input line needs the post text (``text``, or the ``title``/``category``/
+``body``/``notes`` fields the API combines) and the ``spam`` and ``politics``
+labels (truthy values mark a positive example).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import mmap
+import os
+import random
+import sys
+import time
+from array import array
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .config import DEFAULT_CONFIG, FilterConfig, Thresholds
+from .lexicon import LexiconChecker
+from .normalizer import TextNormalizer
+from .rules import RuleEngine
+
+try:  # pragma: no cover - depends on the environment
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+FEATURE_NAMES: Tuple[str, ...] = (
+    "token_count",
+    "unique_word_ratio",
+    "url_count",
+    "uppercase_ratio",
+    "long_repeat_ratio",
+    "sentence_count",
+    "question_mark_count",
+    "spam_keyword_hits",
+    "politics_keyword_hits",
+)
+SCORE_COLUMNS: Tuple[str, ...] = ("spam_rule", "politics_rule")
+LABEL_COLUMNS: Tuple[str, ...] = ("spam", "politics")
+COLUMNS: Tuple[str, ...] = FEATURE_NAMES + SCORE_COLUMNS + LABEL_COLUMNS
+ROW_WIDTH = len(COLUMNS)
+
+_TEXT_FIELDS = ("title", "category", "body", "notes")
+_THRESHOLD_STEPS = 100
+_CACHE_VERSION = 1
+
+
+@dataclass
+class TrainingSettings:
+    """Hyper-parameters for minibatch SGD."""
+
+    epochs: int = 5
+    batch_size: int = 256
+    learning_rate: float = 0.1
+    l2: float = 1e-4
+    seed: int = 13
+    workers: int = 1
+    chunk_size: int = 512
+
+
+@dataclass
+class TrainingReport:
+    """Summary of a training run."""
+
+    rows: int
+    cache_hit: bool
+    extract_seconds: float
+    train_seconds: float
+    epochs: int
+    spam_loss: float
+    politics_loss: float
+    thresholds: Thresholds
+
+    @property
+    def extract_rows_per_second(self) -> float:
+        return self.rows / self.extract_seconds if self.extract_seconds else 0.0
+
+    @property
+    def train_rows_per_second(self) -> float:
+        return self.rows * self.epochs / self.train_seconds if self.train_seconds else 0.0
+
+
+class FeatureExtractor:
+    """Turns raw posts into cache rows using the moderation pipeline."""
+
+    def __init__(self, config: FilterConfig) -> None:
+        self.normalizer = TextNormalizer(config.normalizer)
+        self.lexicon = LexiconChecker(config.lexicon_dir)
+        self.rules = RuleEngine(config.rule_weights)
+
+    def extract(self, text: str) -> Tuple[float, ...]:
+        normalized = self.normalizer.normalize(text or "")
+        lexicon_match = self.lexicon.scan_tokens(normalized.tokens)
+        rule_scores = self.rules.evaluate_match(normalized, lexicon_match)
+        features = rule_scores.features
+        return tuple(float(features.get(name, 0.0)) for name in FEATURE_NAMES) + (
+            round(rule_scores.spam_score, 3),
+            round(rule_scores.politics_score, 3),
+        )
+
+    def extract_lines(self, lines: List[str]) -> bytes:
+        rows = array("d")
+        for line in lines:
+            record = json.loads(line)
+            rows.extend(self.extract(_record_text(record)))
+            rows.append(1.0 if record.get("spam") else 0.0)
+            rows.append(1.0 if record.get("politics") else 0.0)
+        return rows.tobytes()
+
+
+def _record_text(record: Dict[str, object]) -> str:
+    text = record.get("text")
+    if text is not None:
+        return str(text)
+    return "\n".join(str(record.get(field, "") or "") for field in _TEXT_FIELDS)
+
+
+_worker_extractor: Optional[FeatureExtractor] = None
+
+
+def _init_worker(config: FilterConfig) -> None:
+    global _worker_extractor
+    _worker_extractor = FeatureExtractor(config)
+
+
+def _extract_in_worker(lines: List[str]) -> bytes:
+    assert _worker_extractor is not None
+    return _worker_extractor.extract_lines(lines)
+
+
+class FeatureCache:
+    """Packed float64 feature rows on disk with a JSON sidecar."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.meta_path = path.with_name(path.name + ".meta.json")
+
+    def is_valid(self, fingerprint: Dict[str, object]) -> bool:
+        if not self.path.exists() or not self.meta_path.exists():
+            return False
+        with self.meta_path.open("r", encoding="utf-8") as handler:
+            meta = json.load(handler)
+        if meta.get("fingerprint") != fingerprint:
+            return False
+        return self.path.stat().st_size == meta.get("rows", -1) * ROW_WIDTH * 8
+
+    @property
+    def rows(self) -> int:
+        return self.path.stat().st_size // (ROW_WIDTH * 8)
+
+    def build(self, source: Path, config: FilterConfig, settings: TrainingSettings, fingerprint: Dict[str, object]) -> int:
+        """Stream ``source`` through the extractor into the cache file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        rows = 0
+        with tmp_path.open("wb") as out:
+            chunks = _iter_chunks(source, settings.chunk_size)
+            if settings.workers > 1:
+                # En fazla workers*2 parça bellekte bekler; sıralama korunur.
+                pending: Deque[Future] = deque()
+                with ProcessPoolExecutor(
+                    max_workers=settings.workers, initializer=_init_worker, initargs=(config,)
+                ) as executor:
+                    for chunk in chunks:
+                        if len(pending) >= settings.workers * 2:
+                            rows += _write_rows(out, pending.popleft().result())
+                        pending.append(executor.submit(_extract_in_worker, chunk))
+                    while pending:
+                        rows += _write_rows(out, pending.popleft().result())
+            else:
+                extractor = FeatureExtractor(config)
+                for chunk in chunks:
+                    rows += _write_rows(out, extractor.extract_lines(chunk))
+        os.replace(tmp_path, self.path)
+        with self.meta_path.open("w", encoding="utf-8") as handler:
+            json.dump({"fingerprint": fingerprint, "rows": rows}, handler, ensure_ascii=False, indent=2)
+        return rows
+
+    def iter_batches(self, batch_size: int, order: Optional[Sequence[int]] = None) -> Iterator[List[List[float]]]:
+        """Yield minibatches of rows read from the memory-mapped cache.
+
+        Without ``order`` rows come in file (i.e. source data) order. With a
+        permutation of row ids, each batch gathers the next ``batch_size`` ids.
+        """
+        total = self.rows
+        if total == 0:
+            return
+        with self.path.open("rb") as handler, mmap.mmap(handler.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped).cast("d")
+            try:
+                if order is None:
+                    for start in range(0, total, batch_size):
+                        end = min(start + batch_size, total)
+                        flat = view[start * ROW_WIDTH : end * ROW_WIDTH].tolist()
+                        yield [flat[i : i + ROW_WIDTH] for i in range(0, len(flat), ROW_WIDTH)]
+                else:
+                    for start in range(0, len(order), batch_size):
+                        # Sıralı okuma sayfa erişimini toplar; batch içeriği değişmez.
+                        ids = sorted(order[start : start + batch_size])
+                        yield [view[i * ROW_WIDTH : (i + 1) * ROW_WIDTH].tolist() for i in ids]
+            finally:
+                view.release()
+
+
+    def iter_arrays(self, batch_size: int, order: Sequence[int]) -> Iterator["np.ndarray"]:
+        """numpy counterpart of ``iter_batches``; yields ``(rows, ROW_WIDTH)`` copies."""
+        if self.rows == 0:
+            return
+        with self.path.open("rb") as handler, mmap.mmap(handler.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            matrix = np.frombuffer(mapped, dtype=np.float64).reshape(-1, ROW_WIDTH)
+            try:
+                for start in range(0, len(order), batch_size):
+                    # Fancy indexing kopyalar; mmap kapanırken dışarıda görünüm kalmaz.
+                    yield matrix[np.sort(order[start : start + batch_size])]
+            finally:
+                del matrix
+
+
+def _iter_chunks(source: Path, chunk_size: int) -> Iterator[List[str]]:
+    chunk: List[str] = []
+    with source.open("r", encoding="utf-8") as handler:
+        for line in handler:
+            if not line.strip():
+                continue
+            chunk.append(line)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def _write_rows(out, payload: bytes) -> int:
+    out.write(payload)
+    return len(payload) // (ROW_WIDTH * 8)
+
+
+def cache_fingerprint(source: Path, config: FilterConfig) -> Dict[str, object]:
+    stat = source.stat()
+    return {
+        "version": _CACHE_VERSION,
+        "columns": list(COLUMNS),
+        "source": str(source.resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "normalizer": asdict(config.normalizer),
+        "rule_weights": asdict(config.rule_weights),
+        "lexicon_dir": str(config.lexicon_dir),
+        # Sözlükler yerinde düzenlenebilir; dosya boyutu ve mtime da anahtara dahil.
+        "lexicons": [
+            [path.name, path.stat().st_size, path.stat().st_mtime_ns]
+            for path in sorted(config.lexicon_dir.glob("*.txt"))
+        ],
+    }
+
+
+def _sigmoid(score: float) -> float:
+    if score >= 0:
+        return 1.0 / (1.0 + math.exp(-score))
+    exp = math.exp(score)
+    return exp / (1.0 + exp)
+
+
+class _Standardizer:
+    """Per-feature mean/std so SGD behaves across very different scales."""
+
+    def __init__(self, cache: FeatureCache, batch_size: int) -> None:
+        width = len(FEATURE_NAMES)
+        sums = [0.0] * width
+        squares = [0.0] * width
+        count = 0
+        for batch in cache.iter_batches(batch_size):
+            for row in batch:
+                for index in range(width):
+                    value = row[index]
+                    sums[index] += value
+                    squares[index] += value * value
+            count += len(batch)
+        count = max(count, 1)
+        self.means = [total / count for total in sums]
+        self.scales = [
+            math.sqrt(max(square / count - mean * mean, 0.0)) or 1.0
+            for square, mean in zip(squares, self.means)
+        ]
+
+    def transform(self, row: List[float]) -> List[float]:
+        return [(value - mean) / scale for value, mean, scale in zip(row, self.means, self.scales)]
+
+    def to_raw(self, bias: float, weights: List[float]) -> Tuple[float, List[float]]:
+        raw_weights = [weight / scale for weight, scale in zip(weights, self.scales)]
+        raw_bias = bias - sum(weight * mean for weight, mean in zip(raw_weights, self.means))
+        return raw_bias, raw_weights
+
+
+def train_from_cache(
+    cache: FeatureCache, settings: TrainingSettings, use_numpy: Optional[bool] = None
+) -> Tuple[Dict[str, Dict[str, object]], Dict[str, float], float]:
+    """Fit the spam and politics models with minibatch SGD over cached rows.
+
+    ``use_numpy`` defaults to whether numpy is installed. Returns the model
+    payloads (``LinearModel.load`` format), the final epoch log-loss per
+    target and the elapsed training time.
+    """
+    standardizer = _Standardizer(cache, settings.batch_size)
+    if use_numpy is None:
+        use_numpy = np is not None
+
+    began = time.perf_counter()
+    if use_numpy:
+        weights, biases, losses = _sgd_numpy(cache, settings, standardizer)
+    else:
+        weights, biases, losses = _sgd_python(cache, settings, standardizer)
+    elapsed = time.perf_counter() - began
+
+    rows = max(cache.rows, 1)
+    payloads: Dict[str, Dict[str, object]] = {}
+    final_losses: Dict[str, float] = {}
+    for target, label in enumerate(LABEL_COLUMNS):
+        bias, raw_weights = standardizer.to_raw(biases[target], weights[target])
+        payloads[label] = {
+            "bias": round(bias, 6),
+            "features": {name: round(weight, 6) for name, weight in zip(FEATURE_NAMES, raw_weights)},
+        }
+        final_losses[label] = losses[target] / rows
+    return payloads, final_losses, elapsed
+
+
+_SGDState = Tuple[List[List[float]], List[float], List[float]]
+
+
+def _sgd_numpy(cache: FeatureCache, settings: TrainingSettings, standardizer: _Standardizer) -> _SGDState:
+    """Minibatch SGD for both targets at once as ``(batch, features) @ (features, targets)``."""
+    width = len(FEATURE_NAMES)
+    label_offsets = [COLUMNS.index(label) for label in LABEL_COLUMNS]
+    means = np.asarray(standardizer.means)
+    scales = np.asarray(standardizer.scales)
+    weights = np.zeros((width, len(LABEL_COLUMNS)))
+    biases = np.zeros(len(LABEL_COLUMNS))
+    losses = np.zeros(len(LABEL_COLUMNS))
+    rng = np.random.default_rng(settings.seed)
+    decay = 1.0 - settings.learning_rate * settings.l2
+
+    for _ in range(settings.epochs):
+        order = rng.permutation(cache.rows)
+        losses = np.zeros(len(LABEL_COLUMNS))
+        for batch in cache.iter_arrays(settings.batch_size, order):
+            inputs = (batch[:, :width] - means) / scales
+            labels = batch[:, label_offsets]
+            # Sayısal kararlı sigmoid: 0.5 * (1 + tanh(z / 2)).
+            probs = 0.5 * (1.0 + np.tanh(0.5 * (inputs @ weights + biases)))
+            errors = probs - labels
+            step = settings.learning_rate / len(batch)
+            weights = weights * decay - step * (inputs.T @ errors)
+            biases = biases - step * errors.sum(axis=0)
+            likelihood = np.where(labels > 0.5, probs, 1.0 - probs)
+            losses -= np.log(np.maximum(likelihood, 1e-12)).sum(axis=0)
+    return weights.T.tolist(), biases.tolist(), losses.tolist()
+
+
+def _sgd_python(cache: FeatureCache, settings: TrainingSettings, standardizer: _Standardizer) -> _SGDState:
+    """Same update as ``_sgd_numpy``, one scalar loop per row and target."""
+    width = len(FEATURE_NAMES)
+    label_offsets = [COLUMNS.index(label) for label in LABEL_COLUMNS]
+    weights = [[0.0] * width for _ in LABEL_COLUMNS]
+    biases = [0.0] * len(LABEL_COLUMNS)
+    losses = [0.0] * len(LABEL_COLUMNS)
+    rng = random.Random(settings.seed)
+    # Satır düzeyinde karıştırma: kaynak etikete göre gruplu olsa bile batch'ler karışık olur.
+    order = array("q", range(cache.rows))
+    lr = settings.learning_rate
+    decay = 1.0 - lr * settings.l2
+
+    for _ in range(settings.epochs):
+        rng.shuffle(order)
+        losses = [0.0] * len(LABEL_COLUMNS)
+        for batch in cache.iter_batches(settings.batch_size, order=order):
+            inputs = [standardizer.transform(row[:width]) for row in batch]
+            step = lr / len(batch)
+            for target, offset in enumerate(label_offsets):
+                w = weights[target]
+                grad = [0.0] * width
+                grad_bias = 0.0
+                for x, row in zip(inputs, batch):
+                    label = row[offset]
+                    prob = _sigmoid(biases[target] + sum(map(float.__mul__, w, x)))
+                    error = prob - label
+                    grad_bias += error
+                    for index, value in enumerate(x):
+                        grad[index] += error * value
+                    losses[target] -= math.log(max(prob if label else 1.0 - prob, 1e-12))
+                weights[target] = [wi * decay - step * gi for wi, gi in zip(w, grad)]
+                biases[target] -= step * grad_bias
+    return weights, biases, losses
+
+
+def suggest_thresholds(cache: FeatureCache, payloads: Dict[str, Dict[str, object]], batch_size: int) -> Thresholds:
+    """Pick F1-maximizing cut-offs for every rule and model score.
+
+    Scores are bucketed into 0.01-wide histograms so the sweep needs one pass
+    over the cache and constant memory.
+    """
+    width = len(FEATURE_NAMES)
+    histograms = {
+        name: ([0] * (_THRESHOLD_STEPS + 1), [0] * (_THRESHOLD_STEPS + 1))
+        for name in ("spam_rule", "spam_model", "politics_rule", "politics_model")
+    }
+    models = {
+        label: (float(payloads[label]["bias"]), [float(payloads[label]["features"][name]) for name in FEATURE_NAMES])
+        for label in LABEL_COLUMNS
+    }
+    offsets = {name: COLUMNS.index(name) for name in SCORE_COLUMNS + LABEL_COLUMNS}
+
+    for batch in cache.iter_batches(batch_size):
+        for row in batch:
+            features = row[:width]
+            for label in LABEL_COLUMNS:
+                positive = row[offsets[label]] > 0.5
+                bias, weights = models[label]
+                model_score = _sigmoid(bias + sum(map(float.__mul__, weights, features)))
+                for name, score in ((f"{label}_rule", row[offsets[f"{label}_rule"]]), (f"{label}_model", model_score)):
+                    bucket = min(int(round(score, 3) * _THRESHOLD_STEPS + 1e-9), _THRESHOLD_STEPS)
+                    histograms[name][0 if positive else 1][bucket] += 1
+
+    defaults = Thresholds()
+    chosen: Dict[str, float] = {}
+    for name, (positives, negatives) in histograms.items():
+        total_positive = sum(positives)
+        best_f1, best = -1.0, getattr(defaults, name)
+        true_pos = false_pos = 0
+        # Yüksek eşikten aşağı doğru: bucket >= k olanlar işaretlenir.
+        for step in range(_THRESHOLD_STEPS, 0, -1):
+            true_pos += positives[step]
+            false_pos += negatives[step]
+            if not total_positive or not true_pos:
+                continue
+            precision = true_pos / (true_pos + false_pos)
+            recall = true_pos / total_positive
+            f1 = 2 * precision * recall / (precision + recall)
+            if f1 > best_f1:
+                best_f1, best = f1, step / _THRESHOLD_STEPS
+        chosen[name] = best
+    return Thresholds(**chosen)
+
+
+def train(
+    source: Path,
+    output_dir: Path,
+    settings: Optional[TrainingSettings] = None,
+    config: Optional[FilterConfig] = None,
+    cache_path: Optional[Path] = None,
+) -> TrainingReport:
+    """Train both models from ``source`` and write them to ``output_dir``."""
+    settings = settings or TrainingSettings()
+    config = config or DEFAULT_CONFIG
+    cache = FeatureCache(cache_path or source.with_name(source.name + ".features"))
+    fingerprint = cache_fingerprint(source, config)
+
+    began = time.perf_counter()
+    cache_hit = cache.is_valid(fingerprint)
+    if not cache_hit:
+        cache.build(source, config, settings, fingerprint)
+    extract_seconds = time.perf_counter() - began
+    if cache.rows == 0:
+        raise ValueError(f"No labeled posts found in {source}")
+
+    payloads, losses, train_seconds = train_from_cache(cache, settings)
+    thresholds = suggest_thresholds(cache, payloads, settings.batch_size)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for label in LABEL_COLUMNS:
+        _write_json(output_dir / f"{label}_model.json", payloads[label])
+    _write_json(output_dir / "thresholds.json", asdict(thresholds))
+
+    return TrainingReport(
+        rows=cache.rows,
+        cache_hit=cache_hit,
+        extract_seconds=extract_seconds,
+        train_seconds=train_seconds,
+        epochs=settings.epochs,
+        spam_loss=losses["spam"],
+        politics_loss=losses["politics"],
+        thresholds=thresholds,
+    )
+
+
+def _write_json(path: Path, payload: Dict[str, object]) -> None:
+    with path.open("w", encoding="utf-8") as handler:
+        json.dump(payload, handler, ensure_ascii=False, indent=2)
+        handler.write("\n")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Train the spam/politics linear models from labeled NDJSON posts.")
+    parser.add_argument("source", type=Path, help="Etiketli gönderiler (NDJSON)")
+    parser.add_argument("--output-dir", type=Path, default=DEFAULT_CONFIG.model_dir)
+    parser.add_argument("--cache", type=Path, default=None, help="Özellik önbelleği yolu")
+    parser.add_argument("--epochs", type=int, default=TrainingSettings.epochs)
+    parser.add_argument("--batch-size", type=int, default=TrainingSettings.batch_size)
+    parser.add_argument("--learning-rate", type=float, default=TrainingSettings.learning_rate)
+    parser.add_argument("--l2", type=float, default=TrainingSettings.l2)
+    parser.add_argument("--seed", type=int, default=TrainingSettings.seed)
+    parser.add_argument("--workers", type=int, default=TrainingSettings.workers)
+    args = parser.parse_args(argv)
+
+    settings = TrainingSettings(
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        learning_rate=args.learning_rate,
+        l2=args.l2,
+        seed=args.seed,
+        workers=args.workers,
+    )
+    report = train(args.source, args.output_dir, settings=settings, cache_path=args.cache)
+
+    print(
+        json.dumps(
+            {
+                "rows": report.rows,
+                "cache_hit": report.cache_hit,
+                "extract_seconds": round(report.extract_seconds, 3),
+                "extract_rows_per_second": round(report.extract_rows_per_second, 1),
+                "train_seconds": round(report.train_seconds, 3),
+                "train_rows_per_second": round(report.train_rows_per_second, 1),
+                "loss": {"spam": round(report.spam_loss, 4), "politics": round(report.politics_loss, 4)},
+                "thresholds": asdict(report.thresholds),
+            },
+            ensure_ascii=False,
+        ),
+        file=sys.stdout,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,138 @@
+import json
+import shutil
+
+import pytest
+
+from src.filter import ContentModerator
+from src.filter.config import DEFAULT_CONFIG
+from src.filter.moderator import ModerationResult, ModerationStatus
+from src.filter.response import dumps_response, moderation_response, moderation_response_json
+
+
+moderator = ContentModerator.load_default()
+
+SAMPLES = [
+    "Bugün hava çok güzel, yürüyüşe çıkıyorum.",
+    "bedava bonus kazanmak için hemen https://spam.test linke tıkla",
+    "Bu seçim manifestomuzda demokrasi ve meclis reformu var, oy verin!",
+]
+
+
+def _jsonify_body(result):
+    """Previous app.py response, encoded the way Flask's jsonify does."""
+    meta = result.metadata or {}
+    forbidden = meta.get("forbidden_words", [])
+    spam_kw = meta.get("spam_keywords", [])
+    politics_kw = meta.get("politics_keywords", [])
+    payload = {
+        "moderation": {
+            "status": result.status.value,
+            "reason": result.reason,
+            "scores": {
+                "spam_rule": result.scores.get("spam_rule", 0),
+                "spam_model": result.scores.get("spam_model", 0),
+                "politics_rule": result.scores.get("politics_rule", 0),
+                "politics_model": result.scores.get("politics_model", 0),
+            },
+            "politics_keywords": politics_kw,
+        },
+        "analysis": {
+            "forbidden": {"count": len(forbidden), "words": forbidden},
+            "spam": {"count": len(spam_kw), "keywords": spam_kw},
+            "politics": {"count": len(politics_kw), "keywords": politics_kw},
+        },
+    }
+    return (json.dumps(payload, sort_keys=True, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_response_matches_jsonify_bytes(text):
+    result = moderator.moderate(text)
+    assert moderation_response_json(result) == _jsonify_body(result)
+
+
+@pytest.mark.parametrize("value", ["temiz", "şerefsiz", "a\x01b\n\"", "\x7f", "\U0001f600"])
+def test_dumps_response_escapes_like_jsonify(value):
+    payload = {"a": [value, 0.001, 1.0, 0], "b": {"c": value}}
+    expected = (json.dumps(payload, sort_keys=True, separators=(",", ":")) + "\n").encode("utf-8")
+    assert dumps_response(payload) == expected
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_api_response_matches_flask_jsonify(text):
+    pytest.importorskip("flask")
+    import app as flask_app
+    from flask import jsonify
+
+    response = flask_app.app.test_client().post("/api/moderate", json={"title": text})
+    with flask_app.app.app_context():
+        expected = jsonify(moderation_response(flask_app.moderator.moderate("\n".join([text, "", "", ""]))))
+    assert response.get_data() == expected.get_data()
+    assert response.mimetype == expected.mimetype
+
+
+def test_shadow_api_disabled_without_candidates(monkeypatch):
+    pytest.importorskip("flask")
+    import app as flask_app
+
+    monkeypatch.delenv("SHADOW_MODEL_DIRS", raising=False)
+    assert flask_app.build_shadow_evaluator() is None
+    monkeypatch.setattr(flask_app, "shadow", None)
+    assert flask_app.app.test_client().get("/api/shadow").get_json() == {"enabled": False}
+
+
+def test_shadow_api_reports_candidates_by_full_path(monkeypatch, tmp_path):
+    pytest.importorskip("flask")
+    import app as flask_app
+
+    dirs = []
+    for parent in ("a", "b"):
+        model_dir = tmp_path / parent / "models"
+        shutil.copytree(DEFAULT_CONFIG.model_dir, model_dir)
+        dirs.append(str(model_dir))
+    # Aynı klasör adı (models) iki farklı yolda; tekrarlanan yol tek aday sayılır.
+    monkeypatch.setenv("SHADOW_MODEL_DIRS", ",".join(dirs + [dirs[0]]))
+    monkeypatch.setenv("SHADOW_SAMPLE_RATE", "1")
+    monkeypatch.setenv("SHADOW_QUEUE_SIZE", "10")
+
+    evaluator = flask_app.build_shadow_evaluator()
+    try:
+        assert sorted(evaluator.candidates) == sorted(dirs)
+        assert evaluator.sample_rate == 1.0
+        monkeypatch.setattr(flask_app, "shadow", evaluator)
+        monkeypatch.setattr(flask_app.moderator, "shadow", evaluator)
+
+        client = flask_app.app.test_client()
+        client.post("/api/moderate", json={"title": SAMPLES[0]})
+        evaluator.join()
+        snapshot = client.get("/api/shadow").get_json()
+    finally:
+        evaluator.close()
+
+    assert snapshot["enabled"] is True
+    assert snapshot["sampled"] == 1
+    assert sorted(snapshot["candidates"]) == sorted(dirs)
+    for stats in snapshot["candidates"].values():
+        assert stats["compared"] == 1
+        assert stats["disagreements"] == 0
+
+
+def test_metadata_is_built_from_matches_and_cached():
+    result = ModerationResult(
+        status=ModerationStatus.ADMIN_REVIEW_POLITICS,
+        reason=["politics_supheli"],
+        scores={},
+        matches=(set(), {"bonus", "bedava"}, {"seçim", "demokrasi", "meclis"}),
+    )
+    assert result.metadata == {
+        "forbidden_words": [],
+        "spam_keywords": ["bedava", "bonus"],
+        "politics_keywords": ["demokrasi", "meclis", "seçim"],
+    }
+    assert result.metadata is result.metadata
+
+
+def test_moderator_metadata_is_sorted():
+    result = moderator.moderate("Bu seçim manifestomuzda demokrasi ve meclis reformu var, oy verin!")
+    keywords = result.metadata["politics_keywords"]
+    assert keywords and keywords == sorted(keywords)
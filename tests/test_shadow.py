@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+from src.filter import ContentModerator, ModerationStatus, ShadowEvaluator
+from src.filter.config import DEFAULT_CONFIG, FilterConfig, Thresholds
+from src.filter.moderator import ModerationResult
+
+
+def test_shadow_records_disagreements_per_status():
+    strict = ContentModerator(
+        FilterConfig(thresholds=Thresholds(spam_rule=0.0, spam_model=0.0, politics_rule=2.0, politics_model=2.0))
+    )
+    shadow = ShadowEvaluator({"strict": strict}, sample_rate=1.0)
+    moderator = ContentModerator(DEFAULT_CONFIG, shadow=shadow)
+
+    result = moderator.moderate("Bugün hava çok güzel, yürüyüşe çıkıyorum.")
+    assert result.status == ModerationStatus.ACCEPT
+    shadow.join()
+
+    snapshot = shadow.snapshot()
+    candidate = snapshot["candidates"]["strict"]
+    assert snapshot["sampled"] == 1
+    assert candidate["disagreements"] == 1
+    accept = candidate["by_status"][ModerationStatus.ACCEPT.value]
+    assert accept["candidate_status"] == {ModerationStatus.ADMIN_REVIEW_SPAM.value: 1}
+    assert candidate["latency"]["count"] == 1
+
+
+class _BlockingCandidate:
+    def __init__(self):
+        self.release = threading.Event()
+
+    def moderate(self, text):
+        self.release.wait()
+        return ModerationResult(status=ModerationStatus.ACCEPT, reason=["temiz"], scores={}, metadata={})
+
+
+def test_shadow_drops_samples_when_queue_is_full():
+    candidate = _BlockingCandidate()
+    shadow = ShadowEvaluator({"slow": candidate}, sample_rate=1.0, queue_size=1)
+    moderator = ContentModerator(DEFAULT_CONFIG, shadow=shadow)
+
+    for _ in range(5):
+        moderator.moderate("merhaba")
+    candidate.release.set()
+    shadow.join()
+
+    snapshot = shadow.snapshot()
+    assert snapshot["dropped"] >= 3
+    assert snapshot["sampled"] + snapshot["dropped"] == 5
+
+
+def test_shadow_rejects_unbounded_queue():
+    with pytest.raises(ValueError):
+        ShadowEvaluator({}, queue_size=0)
+
+
+class _BrokenCandidate:
+    def moderate(self, text):
+        return None
+
+
+def test_shadow_counts_invalid_candidate_results_as_errors():
+    shadow = ShadowEvaluator({"broken": _BrokenCandidate()}, sample_rate=1.0)
+    moderator = ContentModerator(DEFAULT_CONFIG, shadow=shadow)
+
+    moderator.moderate("merhaba")
+    moderator.moderate("merhaba")
+    shadow.join()
+
+    snapshot = shadow.snapshot()
+    assert snapshot["candidates"]["broken"]["errors"] == 2
+    assert snapshot["candidates"]["broken"]["compared"] == 0
+
+
+def test_shadow_close_does_not_block_on_a_full_queue():
+    candidate = _BlockingCandidate()
+    shadow = ShadowEvaluator({"slow": candidate}, sample_rate=1.0, queue_size=1)
+    moderator = ContentModerator(DEFAULT_CONFIG, shadow=shadow)
+    for _ in range(3):
+        moderator.moderate("merhaba")
+    dropped = shadow.snapshot()["dropped"]
+
+    shadow.close(timeout=0.1)
+    moderator.moderate("merhaba")
+    assert shadow.snapshot()["dropped"] == dropped
+
+    candidate.release.set()
+    shadow.join()
+    assert shadow.snapshot()["queued"] == 0
@@ -0,0 +1,108 @@
+import json
+import random
+import shutil
+
+import pytest
+
+from src.filter.config import DEFAULT_CONFIG, FilterConfig
+from src.filter.model import LinearModel
+from src.filter.training import COLUMNS, FeatureCache, TrainingSettings, cache_fingerprint, train, train_from_cache
+
+
+def _write_posts(path):
+    samples = [
+        ({"text": "bedava bonus kazan https://spam.test HEMEN TIKLA"}, 1, 0),
+        ({"title": "Meclis", "body": "seçim demokrasi meclis reformu, oy verin!"}, 0, 1),
+        ({"text": "Bugün hava çok güzel, yürüyüşe çıkıyorum."}, 0, 0),
+    ]
+    with path.open("w", encoding="utf-8") as handler:
+        for _ in range(20):
+            for record, spam, politics in samples:
+                handler.write(json.dumps({**record, "spam": spam, "politics": politics}, ensure_ascii=False) + "\n")
+
+
+def test_training_writes_loadable_models_and_reuses_cache(tmp_path):
+    source = tmp_path / "posts.ndjson"
+    _write_posts(source)
+    settings = TrainingSettings(epochs=20, batch_size=8, learning_rate=0.5)
+
+    report = train(source, tmp_path / "models", settings=settings)
+    assert report.rows == 60
+    assert not report.cache_hit
+
+    spam_model = LinearModel.load(tmp_path / "models" / "spam_model.json")
+    politics_model = LinearModel.load(tmp_path / "models" / "politics_model.json")
+    assert spam_model.weights["url_count"] > 0
+    assert politics_model.weights["politics_keyword_hits"] > 0
+    assert (tmp_path / "models" / "thresholds.json").exists()
+
+    again = train(source, tmp_path / "models", settings=settings)
+    assert again.cache_hit
+    assert again.thresholds == report.thresholds
+
+
+def test_editing_a_lexicon_invalidates_the_cache(tmp_path):
+    lexicon_dir = tmp_path / "lexicons"
+    shutil.copytree(DEFAULT_CONFIG.lexicon_dir, lexicon_dir)
+    config = FilterConfig(lexicon_dir=lexicon_dir)
+    source = tmp_path / "posts.ndjson"
+    _write_posts(source)
+    settings = TrainingSettings(epochs=1)
+
+    train(source, tmp_path / "models", settings=settings, config=config)
+    with (lexicon_dir / "spam.txt").open("a", encoding="utf-8") as handler:
+        handler.write("\nyürüyüşe\n")
+
+    report = train(source, tmp_path / "models", settings=settings, config=config)
+    assert not report.cache_hit
+
+
+def test_row_level_shuffle_mixes_grouped_labels(tmp_path):
+    source = tmp_path / "posts.ndjson"
+    with source.open("w", encoding="utf-8") as handler:
+        for spam in (1, 0):
+            for _ in range(64):
+                handler.write(json.dumps({"text": "merhaba", "spam": spam, "politics": 0}) + "\n")
+    cache = FeatureCache(tmp_path / "posts.features")
+    cache.build(source, DEFAULT_CONFIG, TrainingSettings(), cache_fingerprint(source, DEFAULT_CONFIG))
+
+    order = list(range(cache.rows))
+    random.Random(0).shuffle(order)
+    spam_offset = COLUMNS.index("spam")
+    batches = list(cache.iter_batches(16, order=order))
+    assert sum(len(batch) for batch in batches) == 128
+    assert any(0 < sum(row[spam_offset] for row in batch) < len(batch) for batch in batches)
+
+
+def test_numpy_and_python_updates_agree(tmp_path):
+    pytest.importorskip("numpy")
+    source = tmp_path / "posts.ndjson"
+    _write_posts(source)
+    cache = FeatureCache(tmp_path / "posts.features")
+    cache.build(source, DEFAULT_CONFIG, TrainingSettings(), cache_fingerprint(source, DEFAULT_CONFIG))
+    # Tek batch: karıştırma sırası güncellemeyi etkilemez, iki yol aynı sonucu vermeli.
+    settings = TrainingSettings(epochs=5, batch_size=cache.rows, learning_rate=0.5)
+
+    vectorized, vectorized_loss, _ = train_from_cache(cache, settings, use_numpy=True)
+    scalar, scalar_loss, _ = train_from_cache(cache, settings, use_numpy=False)
+    for label in ("spam", "politics"):
+        assert vectorized[label]["bias"] == pytest.approx(scalar[label]["bias"], abs=1e-5)
+        for name, weight in scalar[label]["features"].items():
+            assert vectorized[label]["features"][name] == pytest.approx(weight, abs=1e-5)
+        assert vectorized_loss[label] == pytest.approx(scalar_loss[label])
+
+
+def test_parallel_extraction_matches_single_worker(tmp_path):
+    source = tmp_path / "posts.ndjson"
+    _write_posts(source)
+    caches = {}
+    for workers in (1, 2):
+        # Küçük parçalar: birden fazla parça işçilere dağıtılır ve sırayla yazılır.
+        settings = TrainingSettings(epochs=2, workers=workers, chunk_size=7)
+        output_dir = tmp_path / f"models_{workers}"
+        cache_path = tmp_path / f"posts_{workers}.features"
+        report = train(source, output_dir, settings=settings, cache_path=cache_path)
+        assert report.rows == 60
+        caches[workers] = (cache_path.read_bytes(), (output_dir / "spam_model.json").read_text(encoding="utf-8"))
+
+    assert caches[1] == caches[2]